@@ -11,73 +11,88 @@ import re
 import shutil
 import hashlib
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    # orjson parses and serializes considerably faster; the stdlib is the fallback
+    import orjson
+except ImportError:
+    orjson = None
 
-def hex_to_rgb(hex_color):
-    """Convert hex color to RGB tuple."""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
+# Matches a {{name}} placeholder and captures the variable name
+PLACEHOLDER_RE = re.compile(rb'\{\{([^{}]+)\}\}')
 
-def format_color(color_name, color_data, format_type):
-    """Format a color according to the specified format type."""
-    hex_color = color_data["hex"]
-    opacity = color_data.get("opacity", 1.0)
-    
-    if format_type == "hash":
-        return hex_color
-    
-    elif format_type == "0x":
-        return f"0x{hex_color[1:]}"
-    
-    elif format_type == "rgb_array":
-        r, g, b = hex_to_rgb(hex_color)
-        return f"[{r}, {g}, {b}]"
-    
-    elif format_type.startswith("rgba"):
-        r, g, b = hex_to_rgb(hex_color)
-        
-        # Handle different rgba formats
-        if format_type == "rgba_1_0":
-            return f"rgba({r},{g},{b},{opacity})"
-        elif format_type == "rgba_0_8":
-            return f"rgba({r},{g},{b},0.8)"
-        elif format_type == "rgba_ee":
-            # Hyprland format: rgba(HEXee) where ee is alpha in hex (no # symbol)
-            return f"rgba({hex_color[1:]}ee)"
-        elif format_type == "rgba_88":
-            # Hyprland format: rgba(HEX88) where 88 is alpha in hex (no # symbol)  
-            return f"rgba({hex_color[1:]}88)"
-        elif format_type == "rgba":
-            return f"rgba({r}, {g}, {b}, {opacity})"
-        else:
-            return f"rgba({r},{g},{b},{opacity})"
-    
-    return hex_color
+# Format suffixes generated for every color variable, in color_formats() order
+COLOR_FORMATS = ("hash", "0x", "rgb_array", "rgba_1_0", "rgba_0_8", "rgba_ee", "rgba_88", "rgba")
+
+# Maps hex digits 0-9 onto letters for Chromium extension IDs
+_DIGITS_TO_LETTERS = str.maketrans("0123456789", "abcdefghij")
+
+# File types stored uncompressed in the CRX package
+_COMPRESSED_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+# Serializes progress output from concurrent template workers
+_LOG_LOCK = threading.Lock()
+
+# Tokenized templates keyed by path, stored with the mtime they were read at
+_TEMPLATE_CACHE = {}
+
+
+@lru_cache(maxsize=None)
+def hex_to_rgb(hex_color):
+    """Convert hex color to RGB tuple."""
+    return tuple(bytes.fromhex(hex_color.lstrip('#'))[:3])
+
+
+@lru_cache(maxsize=None)
+def color_formats(hex_color, opacity=1.0):
+    """Build every supported format of a color, ordered like COLOR_FORMATS."""
+    r, g, b = hex_to_rgb(hex_color)
+    stem = hex_color[1:]
+    return (
+        hex_color,
+        f"0x{stem}",
+        f"[{r}, {g}, {b}]",
+        f"rgba({r},{g},{b},{opacity})",
+        f"rgba({r},{g},{b},0.8)",
+        # Hyprland formats: rgba(HEXaa) where aa is alpha in hex (no # symbol)
+        f"rgba({stem}ee)",
+        f"rgba({stem}88)",
+        f"rgba({r}, {g}, {b}, {opacity})",
+    )
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj, indent=True):
+    """Serialize an object to JSON bytes, indented by two spaces unless indent is False."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
 
 
 def load_colors(colors_file):
     """Load colors from JSON file."""
-    with open(colors_file, 'r') as f:
-        data = json.load(f)
-    return data['colors']
+    return json_loads(Path(colors_file).read_bytes())['colors']
 
 
-def generate_color_vars(colors):
-    """Generate all color variables for template replacement."""
-    color_vars = {}
+def generate_color_vars(colors, used_vars=None):
+    """Generate color variables for template replacement.
     
-    # First, generate standard color variants
-    for color_name, color_data in colors.items():
-        # Generate different format variants
-        formats = ["hash", "0x", "rgb_array", "rgba_1_0", "rgba_0_8", "rgba_ee", "rgba_88", "rgba"]
-        
-        for fmt in formats:
-            var_name = f"{color_name}_{fmt}"
-            color_vars[var_name] = format_color(color_name, color_data, fmt)
-    
-    # Add hardcoded alpha variants that reference base colors with specific alpha values
+    When used_vars is given, only variables named in it are generated.
+    """
+    # Hardcoded alpha variants that reference base colors with specific alpha values
     alpha_variants = {
         # New alpha variants using new color names
         "base_dark_alpha": ("base_dark", 0.8),
@@ -94,44 +109,124 @@ def generate_color_vars(colors):
         "base2_alpha": ("base_light01", 0.93),
     }
     
-    # Generate format variants for alpha colors
-    for alpha_name, (base_color_name, alpha_value) in alpha_variants.items():
-        if base_color_name in colors:
-            base_color_data = colors[base_color_name].copy()
-            base_color_data["opacity"] = alpha_value
-            
-            formats = ["hash", "0x", "rgb_array", "rgba_1_0", "rgba_0_8", "rgba_ee", "rgba_88", "rgba"]
-            for fmt in formats:
-                var_name = f"{alpha_name}_{fmt}"
-                color_vars[var_name] = format_color(alpha_name, base_color_data, fmt)
+    # First, generate standard color variants
+    color_vars = {
+        f"{color_name}_{fmt}": value
+        for color_name, color_data in colors.items()
+        for fmt, value in zip(COLOR_FORMATS, color_formats(color_data["hex"], color_data.get("opacity", 1.0)))
+        if used_vars is None or f"{color_name}_{fmt}" in used_vars
+    }
+    
+    # Then format variants for alpha colors whose base color is defined
+    color_vars.update(
+        (f"{alpha_name}_{fmt}", value)
+        for alpha_name, (base_color_name, alpha_value) in alpha_variants.items()
+        if base_color_name in colors
+        for fmt, value in zip(COLOR_FORMATS, color_formats(colors[base_color_name]["hex"], alpha_value))
+        if used_vars is None or f"{alpha_name}_{fmt}" in used_vars
+    )
     
     return color_vars
 
 
+def encode_color_vars(color_vars):
+    """Encode color variable names and values to bytes for template substitution."""
+    return {name.encode(): value.encode() for name, value in color_vars.items()}
+
+
+def fast_copy(src, dst):
+    """Copy a file like shutil.copy2, letting the kernel clone or copy the data where supported."""
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            # copy_file_range may stop short (files that grew, or pseudo-files
+            # reporting size 0); copy whatever is left from the advanced offsets
+            shutil.copyfileobj(fsrc, fdst)
+    except (AttributeError, OSError):
+        # copy_file_range is Linux-only and may be refused across filesystems
+        return shutil.copy2(src, dst)
+    
+    shutil.copystat(src, dst)
+    return dst
+
+
+def sync_copy(src, dst):
+    """Copy a file with fast_copy unless dst already matches src in size and modification time."""
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+        # fast_copy preserves mtimes, so a previous copy still matches exactly
+        if src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+            return dst
+    except OSError:
+        pass
+    
+    # Copy to a temporary sibling and rename it over dst, so a read-only previous copy can still be replaced
+    head, tail = os.path.split(dst)
+    tmp_path = os.path.join(head, f".{tail}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        fast_copy(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return dst
+
+
+def sync_tree(src, dst):
+    """Mirror the src directory into dst, copying only changed files and removing stale ones."""
+    # Drop anything in dst that src no longer contains or that changed between file and directory,
+    # before copying, so copytree can recreate those entries with their new type
+    for root, dirs, files in os.walk(dst):
+        src_root = os.path.join(src, os.path.relpath(root, dst))
+        for name in files:
+            if not os.path.isfile(os.path.join(src_root, name)):
+                os.remove(os.path.join(root, name))
+        for name in list(dirs):
+            if not os.path.isdir(os.path.join(src_root, name)):
+                shutil.rmtree(os.path.join(root, name))
+                dirs.remove(name)
+    
+    shutil.copytree(src, dst, copy_function=sync_copy, dirs_exist_ok=True)
+
+
 def create_crx_package(theme_dir, output_path):
     """Create a CRX package from the theme directory."""
     try:
         # Try to create a simple zip package (CRX is essentially a zip with headers)
         import zipfile
         
-        zip_path = output_path.with_suffix('.zip')
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in theme_dir.rglob('*'):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(theme_dir)
-                    zipf.write(file_path, arcname)
-        
-        # Rename to .crx for browser recognition
+        # Write the archive straight to .crx for browser recognition
         crx_path = output_path.with_suffix('.crx')
-        zip_path.rename(crx_path)
+        with zipfile.ZipFile(crx_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+            for root, _, files in os.walk(theme_dir):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    arcname = os.path.relpath(file_path, theme_dir)
+                    # Images are already compressed; deflating them again only burns CPU
+                    compress_type = zipfile.ZIP_STORED if name.lower().endswith(_COMPRESSED_SUFFIXES) else None
+                    zipf.write(file_path, arcname, compress_type=compress_type)
+        
         return crx_path
     except Exception as e:
         print(f"Warning: Could not create CRX package: {e}")
         return None
 
 
-def install_browser_extension(theme_dir):
-    """Install the Chromium theme extension into supported browsers using multiple methods."""
+def install_browser_extension(theme_dir, launch_browsers=False):
+    """Install the Chromium theme extension into supported browsers using multiple methods.
+    
+    Browsers are only launched with --load-extension when launch_browsers is True.
+    """
     installed_browsers = []
     failed_browsers = []
     
@@ -154,119 +249,135 @@ def install_browser_extension(theme_dir):
          ["External Extensions", "Extensions"]),
     ]
     
-    # Generate consistent extension ID from theme directory path
-    extension_id = hashlib.sha256(str(theme_dir).encode()).hexdigest()[:32]
-    # Replace numbers with letters to ensure valid extension ID
-    extension_id = ''.join(['abcdefghij'[int(c)] if c.isdigit() else c for c in extension_id])
+    # Stat each candidate profile directory once, keeping only those that exist
+    browser_roots = [
+        (browser_name, [config_dir for config_dir in config_dirs if config_dir.exists()], ext_subpaths)
+        for browser_name, config_dirs, ext_subpaths in browsers
+    ]
+    
+    # Nothing to install into when no browser has a profile directory yet
+    if not any(config_dirs for _, config_dirs, _ in browser_roots):
+        print("  No Chromium-based browser profiles found; skipping browser installation")
+        return installed_browsers, failed_browsers
+    
+    # Generate consistent extension ID from theme directory path,
+    # replacing numbers with letters to ensure a valid extension ID
+    extension_id = hashlib.sha256(str(theme_dir).encode()).hexdigest()[:32].translate(_DIGITS_TO_LETTERS)
     
     # Try to create a CRX package for better compatibility
     crx_path = create_crx_package(theme_dir, theme_dir.parent / f"theme_{extension_id}")
     
-    for browser_name, config_dirs, ext_subpaths in browsers:
+    for browser_name, config_dirs, ext_subpaths in browser_roots:
         browser_installed = False
         for config_dir in config_dirs:
-            if config_dir.exists():
+            try:
+                # Method 1: External Extensions (development mode)
+                if "External Extensions" in ext_subpaths:
+                    ext_dir = config_dir / "External Extensions"
+                    ext_dir.mkdir(parents=True, exist_ok=True)
+                    
+                    ext_config = {
+                        "path": str(theme_dir),
+                        "location": "external"
+                    }
+                    
+                    config_file = ext_dir / f"{extension_id}.json"
+                    config_file.write_bytes(json_dumps(ext_config))
+                    
+                    print(f"  ✓ {browser_name} (External): {config_file}")
+                
+                # Method 2: Direct Extensions directory with symlink
+                if "Extensions" in ext_subpaths:
+                    ext_dir = config_dir / "Extensions" / extension_id
+                    ext_dir.mkdir(parents=True, exist_ok=True)
+                    
+                    # Create version directory
+                    version_dir = ext_dir / "1.0_0"
+                    if version_dir.exists():
+                        shutil.rmtree(version_dir)
+                    
+                    # Copy theme files directly
+                    shutil.copytree(theme_dir, version_dir, copy_function=fast_copy)
+                    print(f"  ✓ {browser_name} (Direct): {version_dir}")
+                
+                # Method 3: Try CRX installation if available
+                if crx_path and crx_path.exists():
+                    try:
+                        # Copy CRX to browser's extension directory
+                        crx_dest = config_dir / f"theme_{extension_id}.crx"
+                        shutil.copy2(crx_path, crx_dest)
+                        print(f"  ✓ {browser_name} (CRX): {crx_dest}")
+                    except Exception:
+                        pass  # CRX method failed, but others might work
+                
+                # Method 4: Preferences modification (advanced)
                 try:
-                    # Method 1: External Extensions (development mode)
-                    if "External Extensions" in ext_subpaths:
-                        ext_dir = config_dir / "External Extensions"
-                        ext_dir.mkdir(parents=True, exist_ok=True)
+                    prefs_file = config_dir / "Default" / "Preferences"
+                    if prefs_file.exists():
+                        # Try to add extension to preferences
+                        prefs = json_loads(prefs_file.read_bytes())
                         
-                        ext_config = {
+                        # Ensure extensions section exists
+                        if 'extensions' not in prefs:
+                            prefs['extensions'] = {}
+                        if 'settings' not in prefs['extensions']:
+                            prefs['extensions']['settings'] = {}
+                        
+                        # Our extension's entry
+                        entry = {
+                            "active_permissions": {"api": ["theme"]},
+                            "creation_flags": 1,
+                            "from_webstore": False,
+                            "location": 4,  # External extension
+                            "manifest": {
+                                "description": "A dark theme generated from extracted colors",
+                                "manifest_version": 3,
+                                "name": "Generated Theme",
+                                "theme": True,
+                                "version": "1.0"
+                            },
                             "path": str(theme_dir),
-                            "location": "external"
+                            "state": 1,  # Enabled
+                            "was_installed_by_default": False
                         }
                         
-                        config_file = ext_dir / f"{extension_id}.json"
-                        with open(config_file, 'w') as f:
-                            json.dump(ext_config, f, indent=2)
-                        
-                        print(f"  ✓ {browser_name} (External): {config_file}")
-                    
-                    # Method 2: Direct Extensions directory with symlink
-                    if "Extensions" in ext_subpaths:
-                        ext_dir = config_dir / "Extensions" / extension_id
-                        ext_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        # Create version directory
-                        version_dir = ext_dir / "1.0_0"
-                        if version_dir.exists():
-                            shutil.rmtree(version_dir)
-                        
-                        # Copy theme files directly
-                        shutil.copytree(theme_dir, version_dir)
-                        print(f"  ✓ {browser_name} (Direct): {version_dir}")
-                    
-                    # Method 3: Try CRX installation if available
-                    if crx_path and crx_path.exists():
-                        try:
-                            # Copy CRX to browser's extension directory
-                            crx_dest = config_dir / f"theme_{extension_id}.crx"
-                            shutil.copy2(crx_path, crx_dest)
-                            print(f"  ✓ {browser_name} (CRX): {crx_dest}")
-                        except Exception:
-                            pass  # CRX method failed, but others might work
-                    
-                    # Method 4: Preferences modification (advanced)
-                    try:
-                        prefs_file = config_dir / "Default" / "Preferences"
-                        if prefs_file.exists():
-                            # Try to add extension to preferences
-                            with open(prefs_file, 'r') as f:
-                                prefs = json.load(f)
+                        settings = prefs['extensions']['settings']
+                        if settings.get(extension_id) == entry:
+                            # Already registered; rewriting would only make the browser reload it
+                            print(f"  ✓ {browser_name} (Prefs): Extension already in preferences")
+                        else:
+                            settings[extension_id] = entry
                             
-                            # Ensure extensions section exists
-                            if 'extensions' not in prefs:
-                                prefs['extensions'] = {}
-                            if 'settings' not in prefs['extensions']:
-                                prefs['extensions']['settings'] = {}
-                            
-                            # Add our extension
-                            prefs['extensions']['settings'][extension_id] = {
-                                "active_permissions": {"api": ["theme"]},
-                                "creation_flags": 1,
-                                "from_webstore": False,
-                                "location": 4,  # External extension
-                                "manifest": {
-                                    "description": "A dark theme generated from extracted colors",
-                                    "manifest_version": 3,
-                                    "name": "Generated Theme",
-                                    "theme": True,
-                                    "version": "1.0"
-                                },
-                                "path": str(theme_dir),
-                                "state": 1,  # Enabled
-                                "was_installed_by_default": False
-                            }
-                            
-                            # Write back preferences
-                            with open(prefs_file, 'w') as f:
-                                json.dump(prefs, f, indent=2)
+                            # Write back preferences compactly, as the browser itself stores them
+                            prefs_file.write_bytes(json_dumps(prefs, indent=False))
                             
                             print(f"  ✓ {browser_name} (Prefs): Extension added to preferences")
-                    except Exception as e:
-                        pass  # Preferences modification failed
-                    
-                    if not browser_installed:
-                        installed_browsers.append(browser_name)
-                        browser_installed = True
-                    break  # Config dir found, move to next browser
-                    
                 except Exception as e:
-                    if not browser_installed:
-                        failed_browsers.append(f"{browser_name}: {str(e)}")
+                    pass  # Preferences modification failed
+                
+                if not browser_installed:
+                    installed_browsers.append(browser_name)
+                    browser_installed = True
+                break  # Config dir found, move to next browser
+                
+            except Exception as e:
+                if not browser_installed:
+                    failed_browsers.append(f"{browser_name}: {str(e)}")
     
     # Method 5: Try system-wide installation (requires sudo)
     try_system_install(theme_dir, extension_id, installed_browsers, failed_browsers)
     
     # Method 6: Try command-line installation
-    try_command_line_install(theme_dir, crx_path, installed_browsers, failed_browsers)
+    try_command_line_install(theme_dir, crx_path, installed_browsers, failed_browsers, launch_browsers)
     
     return installed_browsers, failed_browsers
 
 
-def try_command_line_install(theme_dir, crx_path, installed_browsers, failed_browsers):
-    """Try installing via command line arguments."""
+def try_command_line_install(theme_dir, crx_path, installed_browsers, failed_browsers, launch_browsers=False):
+    """Try installing via command line arguments.
+    
+    Without launch_browsers, available browsers are only reported instead of started.
+    """
     browsers_cmd = [
         ("Google Chrome", ["google-chrome", "google-chrome-stable"]),
         ("Chromium", ["chromium", "chromium-browser"]),
@@ -275,11 +386,19 @@ def try_command_line_install(theme_dir, crx_path, installed_browsers, failed_bro
     ]
     
     for browser_name, commands in browsers_cmd:
+        # Launching the browser is only worth it when no profile-level method succeeded
+        if browser_name in installed_browsers:
+            continue
+        
         for cmd in commands:
             try:
                 # Check if browser is available
-                result = subprocess.run(['which', cmd], capture_output=True)
-                if result.returncode == 0:
+                if shutil.which(cmd):
+                    # Starting a full browser process is opt-in; report how to load it instead
+                    if not launch_browsers:
+                        print(f"  • {browser_name} (CLI): run '{cmd} --load-extension={theme_dir}' to load the theme")
+                        break
+                    
                     # Try to install the extension using command line
                     if crx_path and crx_path.exists():
                         try:
@@ -323,8 +442,7 @@ def try_system_install(theme_dir, extension_id, installed_browsers, failed_brows
                     "external_version": "1.0"
                 }
                 
-                with open(config_file, 'w') as f:
-                    json.dump(ext_config, f, indent=2)
+                config_file.write_bytes(json_dumps(ext_config))
                 
                 print(f"  ✓ System-wide: {config_file}")
                 if "System-wide" not in installed_browsers:
@@ -336,15 +454,14 @@ def try_system_install(theme_dir, extension_id, installed_browsers, failed_brows
                 try:
                     subprocess.run(['sudo', 'mkdir', '-p', str(sys_dir)], check=True, capture_output=True)
                     
-                    config_content = json.dumps({
+                    config_content = json_dumps({
                         "external_crx": str(theme_dir),
                         "external_version": "1.0"
-                    }, indent=2)
+                    })
                     
                     process = subprocess.run(
                         ['sudo', 'tee', str(config_file)],
                         input=config_content,
-                        text=True,
                         capture_output=True
                     )
                     
@@ -360,31 +477,154 @@ def try_system_install(theme_dir, extension_id, installed_browsers, failed_brows
                 continue
 
 
-def process_template(template_path, output_path, color_vars):
-    """Process a template file and generate the output configuration."""
-    print(f"Processing {template_path} -> {output_path}")
+def log(message):
+    """Print a progress message without interleaving output from worker threads."""
+    with _LOG_LOCK:
+        print(message)
+
+
+def write_file(path, data):
+    """Write bytes to a file atomically through raw os.write calls, skipping the buffered file layer.
     
-    with open(template_path, 'r') as f:
-        content = f.read()
+    The data goes to a temporary sibling that is renamed over path, so readers never see a partial file.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            
+            # Keep the permissions of the file being replaced
+            try:
+                os.fchmod(fd, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def load_template(template_path):
+    """Read and tokenize a template, reusing the cached tokens while the file is unmodified.
+    
+    Returns a tuple alternating literal text and placeholder names, so names sit at odd indices.
+    """
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _TEMPLATE_CACHE.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
     
-    # Replace all color variables in the template
-    for var_name, color_value in color_vars.items():
-        placeholder = f"{{{{{var_name}}}}}"
-        content = content.replace(placeholder, color_value)
+    parts = tuple(PLACEHOLDER_RE.split(template_path.read_bytes()))
+    
+    _TEMPLATE_CACHE[template_path] = (mtime, parts)
+    return parts
+
+
+def template_variables(template_paths):
+    """Collect the placeholder names referenced by the given templates."""
+    names = set()
+    for template_path in template_paths:
+        if template_path.exists():
+            names.update(name.decode() for name in load_template(template_path)[1::2])
+    return names
+
+
+def process_template(template_path, output_path, color_vars):
+    """Process a template file and generate the output configuration.
+    
+    color_vars maps placeholder names to values as bytes (see encode_color_vars).
+    """
+    log(f"Processing {template_path} -> {output_path}")
+    
+    # Swap each placeholder token for its value, keeping unknown placeholders as-is
+    pieces = list(load_template(template_path))
+    remaining_placeholders = []
+    for i in range(1, len(pieces), 2):
+        value = color_vars.get(pieces[i])
+        if value is None:
+            value = b"{{" + pieces[i] + b"}}"
+            remaining_placeholders.append(value)
+        pieces[i] = value
+    content = b"".join(pieces)
     
-    # Check for any unreplaced placeholders
-    remaining_placeholders = re.findall(r'\{\{[^}]+\}\}', content)
     if remaining_placeholders:
-        print(f"Warning: Unreplaced placeholders in {template_path}: {remaining_placeholders}")
+        remaining_placeholders = [p.decode() for p in remaining_placeholders]
+        log(f"Warning: Unreplaced placeholders in {template_path}: {remaining_placeholders}")
+    
+    # Leave the output untouched when it already holds the rendered content
+    try:
+        if output_path.stat().st_size == len(content) and output_path.read_bytes() == content:
+            log(f"Unchanged {output_path}")
+            return
+    except OSError:
+        pass
     
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     # Write the processed content
-    with open(output_path, 'w') as f:
-        f.write(content)
+    write_file(output_path, content)
     
-    print(f"Generated {output_path}")
+    log(f"Generated {output_path}")
+
+
+README_TEMPLATE = """# Omarchy Theme: {theme_name}
+
+This folder was generated by the Omarchy theme generator.
+Colors source: `colors.json`
+
+## Activate the Omarchy desktop theme
+{activate_note}
+
+- Ensure Omarchy is installed and running
+- Select this theme in the Omarchy theme selector or place it under the directory above
+- Reload Hyprland and related apps if needed:
+  - `hyprctl reload` (if Hyprland is running)
+  - Wallpaper is at `backgrounds/wallpaper.png`; common reload methods:
+    - `hyprctl hyprpaper preload <path>` then `hyprctl hyprpaper wallpaper <monitor>,<path>`
+    - `swww img <path>`
+
+Generated configs cover Hyprland, Waybar, Mako, Wofi, Walker, SwayOSD, Alacritty, Neovim, btop, and GTK-4.0.
+
+## GTK-4.0 theme
+A GTK-4.0 theme has been generated as `gtk-4.0.css`. To install:
+```
+./install_gtk_theme.sh
+```
+This will copy the theme to `~/.config/gtk-4.0/gtk.css` and restart Nautilus.
+
+Manual installation:
+```
+mkdir -p ~/.config/gtk-4.0
+cp gtk-4.0.css ~/.config/gtk-4.0/gtk.css
+pkill nautilus; sleep 1; nautilus &
+```
+
+## Chromium/Chrome/Brave/Vivaldi theme (manual install)
+{chromium_note}
+
+Steps:
+1. Open `chrome://extensions/`
+2. Enable 'Developer mode'
+3. Click 'Load unpacked' and select the `chromium-theme` folder inside this theme
+
+To remove or disable, manage it from `chrome://extensions/`.
+
+## Rebuilding
+Regenerate this folder with:
+```
+python3 build_theme.py colors.json -o .
+```
+
+Or extract colors and build in one step:
+```
+./extract_colors_from_image.py <image-path-or-url> --build --output <colors.json> --output-dir <target-folder>
+```"""
 
 
 def write_readme(output_dir: Path, colors_file: Path):
@@ -394,71 +634,24 @@ def write_readme(output_dir: Path, colors_file: Path):
     default_omarchy_dir = Path.home() / ".config" / "omarchy" / "themes"
     is_under_default = str(output_dir).startswith(str(default_omarchy_dir))
 
-    theme_folder_name = output_dir.name
     chromium_dir = output_dir / "chromium-theme"
 
-    lines = []
-    lines.append(f"# Omarchy Theme: {theme_folder_name}")
-    lines.append("")
-    lines.append("This folder was generated by the Omarchy theme generator.")
-    lines.append("Colors source: `colors.json`")
-    lines.append("")
-    lines.append("## Activate the Omarchy desktop theme")
     if is_under_default:
-        lines.append(f"This theme is already placed under the default Omarchy themes dir: `{default_omarchy_dir}`.")
+        activate_note = f"This theme is already placed under the default Omarchy themes dir: `{default_omarchy_dir}`."
     else:
-        lines.append("You can keep this theme here or move/symlink it under the default directory:")
-        lines.append(f"`{default_omarchy_dir}/`")
-    lines.append("")
-    lines.append("- Ensure Omarchy is installed and running")
-    lines.append("- Select this theme in the Omarchy theme selector or place it under the directory above")
-    lines.append("- Reload Hyprland and related apps if needed:")
-    lines.append("  - `hyprctl reload` (if Hyprland is running)")
-    lines.append("  - Wallpaper is at `backgrounds/wallpaper.png`; common reload methods:")
-    lines.append("    - `hyprctl hyprpaper preload <path>` then `hyprctl hyprpaper wallpaper <monitor>,<path>`")
-    lines.append("    - `swww img <path>`")
-    lines.append("")
-    lines.append("Generated configs cover Hyprland, Waybar, Mako, Wofi, Walker, SwayOSD, Alacritty, Neovim, btop, and GTK-4.0.")
-    lines.append("")
-    lines.append("## GTK-4.0 theme")
-    lines.append("A GTK-4.0 theme has been generated as `gtk-4.0.css`. To install:")
-    lines.append("```")
-    lines.append("./install_gtk_theme.sh")
-    lines.append("```")
-    lines.append("This will copy the theme to `~/.config/gtk-4.0/gtk.css` and restart Nautilus.")
-    lines.append("")
-    lines.append("Manual installation:")
-    lines.append("```")
-    lines.append("mkdir -p ~/.config/gtk-4.0")
-    lines.append("cp gtk-4.0.css ~/.config/gtk-4.0/gtk.css")
-    lines.append("pkill nautilus; sleep 1; nautilus &")
-    lines.append("```")
-    lines.append("")
-    lines.append("## Chromium/Chrome/Brave/Vivaldi theme (manual install)")
+        activate_note = ("You can keep this theme here or move/symlink it under the default directory:\n"
+                         f"`{default_omarchy_dir}/`")
+
     if chromium_dir.exists() and (chromium_dir / "manifest.json").exists():
-        lines.append("A Chromium theme has been generated in `chromium-theme/`.")
+        chromium_note = "A Chromium theme has been generated in `chromium-theme/`."
     else:
-        lines.append("If `chromium-theme/` exists, you can load it as an unpacked extension.")
-    lines.append("")
-    lines.append("Steps:")
-    lines.append("1. Open `chrome://extensions/`")
-    lines.append("2. Enable 'Developer mode'")
-    lines.append("3. Click 'Load unpacked' and select the `chromium-theme` folder inside this theme")
-    lines.append("")
-    lines.append("To remove or disable, manage it from `chrome://extensions/`.")
-    lines.append("")
-    lines.append("## Rebuilding")
-    lines.append("Regenerate this folder with:")
-    lines.append("```")
-    lines.append("python3 build_theme.py colors.json -o .")
-    lines.append("```")
-    lines.append("")
-    lines.append("Or extract colors and build in one step:")
-    lines.append("```")
-    lines.append("./extract_colors_from_image.py <image-path-or-url> --build --output <colors.json> --output-dir <target-folder>")
-    lines.append("```")
-
-    readme_path.write_text("\n".join(lines))
+        chromium_note = "If `chromium-theme/` exists, you can load it as an unpacked extension."
+
+    readme_path.write_text(README_TEMPLATE.format(
+        theme_name=output_dir.name,
+        activate_note=activate_note,
+        chromium_note=chromium_note,
+    ), encoding='utf-8')
     print(f"  ✓ README.md written to: {readme_path}")
 
 def main():
@@ -506,10 +699,6 @@ def main():
         print(f"❌ Error loading colors: {e}")
         return 1
     
-    # Generate color variables
-    color_vars = generate_color_vars(colors)
-    print(f"Generated {len(color_vars)} color variables")
-    
     # Define template mappings
     template_mappings = {
         "alacritty.toml.template": "alacritty.toml",
@@ -527,15 +716,30 @@ def main():
         "wofi.css.template": "wofi.css",
     }
     
+    # Generate only the color variables the templates reference
+    used_vars = template_variables(templates_dir / name for name in template_mappings)
+    color_vars = generate_color_vars(colors, used_vars)
+    print(f"Generated {len(color_vars)} color variables")
+    color_vars_bytes = encode_color_vars(color_vars)
+    
     print("\n📁 Processing templates...")
     
-    # Process each template
+    # Render templates concurrently; they are independent of each other
+    with ThreadPoolExecutor(max_workers=min(8, len(template_mappings))) as executor:
+        renders = {
+            template_name: executor.submit(process_template, templates_dir / template_name,
+                                           output_dir / output_name, color_vars_bytes)
+            for template_name, output_name in template_mappings.items()
+            if (templates_dir / template_name).exists()
+        }
+    
+    # Post-process each rendered template in mapping order
     for template_name, output_name in template_mappings.items():
         template_path = templates_dir / template_name
         output_path = output_dir / output_name
         
-        if template_path.exists():
-            process_template(template_path, output_path, color_vars)
+        if template_name in renders:
+            renders[template_name].result()
             
             # Special handling for bash scripts: make them executable
             if template_name.endswith(".sh.template"):
@@ -548,11 +752,12 @@ def main():
                 output_dir_chromium = output_path.parent
                 
                 # Copy any non-template files from the chromium-theme template directory
-                for file_path in template_dir.glob("*"):
-                    if file_path.is_file() and not file_path.name.endswith(".template"):
-                        dest_path = output_dir_chromium / file_path.name
-                        shutil.copy2(file_path, dest_path)
-                        print(f"Copied {file_path.name} to {dest_path}")
+                with os.scandir(template_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file() and not entry.name.endswith(".template"):
+                            dest_path = output_dir_chromium / entry.name
+                            sync_copy(entry.path, dest_path)
+                            print(f"Copied {entry.name} to {dest_path}")
         else:
             print(f"Warning: Template {template_path} not found")
     
@@ -571,10 +776,8 @@ def main():
     theme_backgrounds = output_dir / "backgrounds"
     
     if project_backgrounds.exists():
-        # Copy backgrounds from project to theme directory
-        if theme_backgrounds.exists():
-            shutil.rmtree(theme_backgrounds)
-        shutil.copytree(project_backgrounds, theme_backgrounds)
+        # Sync backgrounds from project to theme directory, skipping unchanged images
+        sync_tree(project_backgrounds, theme_backgrounds)
         print(f"  ✓ backgrounds/ (copied from project)")
     elif theme_backgrounds.exists():
         print(f"  ✓ backgrounds/ (already exists in theme)")
@@ -3,7 +3,6 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "pillow",
-#     "scikit-learn", 
 #     "matplotlib",
 #     "opencv-python",
 #     "numpy",
@@ -14,7 +13,7 @@
 Image-to-Theme Color Extraction Script
 Extract colors from an image (local file or URL) and generate a Night Owl theme configuration.
 
-This script uses K-means clustering to extract dominant colors from an image,
+This script uses median cut quantization to extract dominant colors from an image,
 then intelligently maps them to theme color categories based on brightness,
 saturation, and visual characteristics.
 
@@ -23,6 +22,8 @@ downloaded to a temporary file and cleaned up after processing.
 """
 
 import argparse
+import filecmp
+import hashlib
 import json
 import os
 import shutil
@@ -30,23 +31,32 @@ import sys
 import tempfile
 import urllib.parse
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import colorsys
 import numpy as np
 
 try:
     from PIL import Image
-    from sklearn.cluster import KMeans
-    import matplotlib.pyplot as plt
     import cv2
-    import requests
 except ImportError as e:
     print(f"Missing required dependency: {e}")
     print("Dependencies should be automatically installed by uv.")
     print("If you're not using uv, install manually:")
-    print("pip install pillow scikit-learn matplotlib opencv-python numpy requests")
+    print("pip install pillow matplotlib opencv-python numpy requests")
     sys.exit(1)
 
+try:
+    # orjson serializes considerably faster; the stdlib is the fallback
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Palettes extracted from previously seen images, keyed by image content and settings
+PALETTE_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'omarchy-theme-generator'
+# Bump whenever extraction changes its output, so stale cached palettes are not reused
+PALETTE_CACHE_VERSION = 2
+
 
 def is_url(string: str) -> bool:
     """Check if a string is a valid URL."""
@@ -70,6 +80,9 @@ def download_image_from_url(url: str) -> str:
     Raises:
         Exception: If download fails or image is invalid
     """
+    # Imported here so local-file runs skip loading requests and its dependencies
+    import requests
+    
     print(f"🌐 Downloading image from URL: {url}")
     
     try:
@@ -102,27 +115,35 @@ def download_image_from_url(url: str) -> str:
         elif 'bmp' in content_type:
             file_extension = '.bmp'
         
+        # Reject oversized files up front when the server announces their size
+        max_size = 50 * 1024 * 1024  # 50MB limit
+        total_size = int(response.headers.get('content-length', 0))
+        if total_size > max_size:
+            raise Exception("Image file too large (>50MB)")
+        
         # Create temporary file
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
         
         # Download in chunks to handle large files
-        total_size = int(response.headers.get('content-length', 0))
-        if total_size > 50 * 1024 * 1024:  # 50MB limit
-            temp_file.close()
-            os.unlink(temp_file.name)
-            raise Exception("Image file too large (>50MB)")
-        
         downloaded_size = 0
         chunk_size = 8192
+        progress_step = 256 * 1024  # Redraw progress every 256KB rather than every chunk
         
         for chunk in response.iter_content(chunk_size=chunk_size):
             if chunk:
                 temp_file.write(chunk)
+                previous_size = downloaded_size
                 downloaded_size += len(chunk)
                 
+                # Enforce the limit even when Content-Length is missing or wrong
+                if downloaded_size > max_size:
+                    temp_file.close()
+                    os.unlink(temp_file.name)
+                    raise Exception("Image file too large (>50MB)")
+                
                 # Progress indicator for large files
-                if total_size > 1024 * 1024:  # Show progress for files >1MB
-                    progress = (downloaded_size / total_size) * 100 if total_size > 0 else 0
+                if total_size > 1024 * 1024 and downloaded_size // progress_step != previous_size // progress_step:
+                    progress = (downloaded_size / total_size) * 100
                     print(f"\r📥 Downloaded: {downloaded_size // 1024}KB ({progress:.1f}%)", end='', flush=True)
         
         temp_file.close()
@@ -130,10 +151,11 @@ def download_image_from_url(url: str) -> str:
         if total_size > 1024 * 1024:
             print()  # New line after progress
         
-        # Verify the downloaded file is a valid image
+        # Check the downloaded file is an image; opening only parses the header, and corrupt
+        # pixel data still surfaces when the image is decoded for extraction
         try:
-            with Image.open(temp_file.name) as img:
-                img.verify()
+            with Image.open(temp_file.name):
+                pass
         except Exception as e:
             os.unlink(temp_file.name)
             raise Exception(f"Downloaded file is not a valid image: {e}")
@@ -149,8 +171,7 @@ def download_image_from_url(url: str) -> str:
 
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """Convert hex color to RGB tuple."""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    return tuple(bytes.fromhex(hex_color.lstrip('#'))[:3])
 
 
 def rgb_to_hex(rgb: Tuple[int, int, int]) -> str:
@@ -170,108 +191,252 @@ def hsv_to_rgb(hsv: Tuple[float, float, float]) -> Tuple[int, int, int]:
     return (int(r * 255), int(g * 255), int(b * 255))
 
 
-def extract_dominant_colors(image_path: str, k: int = 8, resize_size: Tuple[int, int] = (200, 200)) -> List[Tuple[int, int, int]]:
+def rgb_to_hsv_array(colors: List[Tuple[int, int, int]]) -> np.ndarray:
+    """Convert RGB (0-255) colors to an (N, 3) array of HSV (0-1), computed exactly as colorsys does."""
+    rgb = np.asarray(colors, dtype=np.float64).reshape(-1, 3) / 255.0
+    r, g, b = rgb.T
+    maxc = rgb.max(axis=1)
+    rangec = maxc - rgb.min(axis=1)
+    
+    # Grays (including black) have no hue or saturation; divide by 1 there to avoid warnings
+    gray = rangec == 0
+    safe_maxc = np.where(gray, 1.0, maxc)
+    safe_rangec = np.where(gray, 1.0, rangec)
+    
+    s = np.where(gray, 0.0, rangec / safe_maxc)
+    rc = (maxc - r) / safe_rangec
+    gc = (maxc - g) / safe_rangec
+    bc = (maxc - b) / safe_rangec
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(gray, 0.0, (h / 6.0) % 1.0)
+    return np.stack((h, s, maxc), axis=1)
+
+
+def hsv_to_rgb_array(hsv: np.ndarray) -> np.ndarray:
+    """Convert an (N, 3) array of HSV (0-1) to RGB (0-255) ints, computed exactly as hsv_to_rgb does."""
+    hsv = np.asarray(hsv, dtype=np.float64).reshape(-1, 3)
+    h, s, v = hsv.T
+    sector = np.floor(h * 6.0)
+    f = (h * 6.0) - sector
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    
+    # Channel order for each of the six hue sectors, as in colorsys.hsv_to_rgb
+    sector = sector.astype(int) % 6
+    candidates = np.stack((v, q, p, t), axis=1)
+    order = np.array([[0, 3, 2], [1, 0, 2], [2, 0, 3], [2, 1, 0], [3, 2, 0], [0, 2, 1]])
+    rgb = np.take_along_axis(candidates, order[sector], axis=1)
+    
+    # Zero saturation is pure gray
+    rgb[s == 0.0] = v[s == 0.0, None]
+    return (rgb * 255).astype(int)
+
+
+def median_cut(pixels: np.ndarray, k: int, refine_iterations: int = 10) -> List[Tuple[Tuple[int, int, int], int]]:
+    """
+    Quantize pixels to at most k colors with median cut on a 5-bit-per-channel histogram.
+    
+    The median cut boxes seed a few weighted Lloyd iterations over the histogram bins, which
+    lets small but distinct hues (accents) pull away from the large background boxes.
+    
+    Args:
+        pixels: (N, 3) uint8 array of RGB pixels
+        k: Number of colors to extract
+        refine_iterations: Maximum number of refinement passes over the histogram bins
+        
+    Returns:
+        List of (RGB tuple, pixel count) pairs, one per color
+    """
+    # Pack each pixel into one little-endian uint32 (R in the low byte) and keep the top
+    # 5 bits of every channel, giving a 15-bit key over a 32x32x32 RGB cube
+    packed = cv2.cvtColor(pixels.reshape(-1, 1, 3), cv2.COLOR_RGB2RGBA).view('<u4').ravel()
+    keys = (((packed >> 3) & 0x1F) | ((packed >> 6) & 0x3E0) | ((packed >> 9) & 0x7C00)).astype(np.intp)
+    counts = np.bincount(keys, minlength=1 << 15)
+    occupied = np.flatnonzero(counts)
+    weights = counts[occupied].astype(np.float64)
+    
+    # Mean color of the pixels in each occupied bin, so colors keep full 8-bit precision
+    bin_colors = np.stack([np.bincount(keys, weights=pixels[:, c], minlength=1 << 15)[occupied]
+                           for c in range(3)], axis=1) / weights[:, None]
+    cells = np.stack((occupied & 31, (occupied >> 5) & 31, (occupied >> 10) & 31), axis=1)
+    
+    # Median cut: repeatedly halve the most populated box at the weighted median of its widest channel
+    boxes = [np.arange(len(occupied))]
+    while len(boxes) < k:
+        splittable = [i for i, box in enumerate(boxes) if len(box) > 1]
+        if not splittable:
+            break  # Fewer distinct colors than requested
+        box = boxes.pop(max(splittable, key=lambda i: weights[boxes[i]].sum()))
+        
+        box_cells = cells[box]
+        axis = int(np.argmax(box_cells.max(axis=0) - box_cells.min(axis=0)))
+        box = box[np.argsort(box_cells[:, axis], kind='stable')]
+        cumulative = np.cumsum(weights[box])
+        cut = min(max(int(np.searchsorted(cumulative, cumulative[-1] / 2)) + 1, 1), len(box) - 1)
+        boxes += [box[:cut], box[cut:]]
+    
+    labels = np.empty(len(occupied), dtype=np.intp)
+    for i, box in enumerate(boxes):
+        labels[box] = i
+    
+    # Refine the box means with weighted Lloyd iterations over the bins (a few thousand at most)
+    n = len(boxes)
+    for iteration in range(refine_iterations + 1):
+        population = np.bincount(labels, weights=weights, minlength=n)
+        centers = np.stack([np.bincount(labels, weights=weights * bin_colors[:, c], minlength=n)
+                            for c in range(3)], axis=1) / np.maximum(population, 1)[:, None]
+        if iteration == refine_iterations:
+            break
+        distances = ((bin_colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        # Keep emptied colors out of the running
+        distances[:, population == 0] = np.inf
+        new_labels = distances.argmin(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    
+    return [(tuple(int(c) for c in center), int(count))
+            for center, count in zip(centers.astype(int), population) if count > 0]
+
+
+def palette_cache_path(image_path: str, k: int, resize_size: Tuple[int, int]) -> Path:
+    """Return the cache file for an image's palette, keyed by file content and extraction settings."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(f"v{PALETTE_CACHE_VERSION}:{k}:{resize_size[0]}x{resize_size[1]}".encode())
+    return PALETTE_CACHE_DIR / f"{digest.hexdigest()}.json"
+
+
+def read_cached_palette(cache_path: Path, k: int) -> Optional[List[Tuple[int, int, int]]]:
+    """Return the palette stored in a cache file, or None if it is missing, unreadable or malformed."""
+    try:
+        cached = json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    
+    # Only trust a non-empty list of at most k RGB triples; anything else is extracted again
+    if not isinstance(cached, list) or not 0 < len(cached) <= k:
+        return None
+    for color in cached:
+        if not (isinstance(color, list) and len(color) == 3
+                and all(type(c) is int and 0 <= c <= 255 for c in color)):
+            return None
+    return [tuple(color) for color in cached]
+
+
+def extract_dominant_colors(image_path: str, k: int = 8, resize_size: Tuple[int, int] = (200, 200),
+                            use_cache: bool = True) -> List[Tuple[int, int, int]]:
     """
-    Extract dominant colors from an image using K-means clustering.
+    Extract dominant colors from an image using median cut quantization.
     
     Args:
         image_path: Path to the image file
-        k: Number of clusters (colors) to extract
+        k: Number of colors to extract
         resize_size: Size to resize image for faster processing
+        use_cache: Reuse and store palettes in PALETTE_CACHE_DIR, skipping decoding on repeat runs
         
     Returns:
         List of RGB tuples representing dominant colors
     """
-    # Load and resize image for faster processing
+    cache_path = palette_cache_path(image_path, k, resize_size) if use_cache else None
+    cached = read_cached_palette(cache_path, k) if cache_path is not None else None
+    if cached is not None:
+        return cached
+    
+    # Load image; PIL handles the wider range of formats and palette/alpha modes
     img = Image.open(image_path)
+    # Let JPEGs decode straight at a reduced scale (DCT scaling), staying at least twice the target size
+    img.draft('RGB', (resize_size[0] * 2, resize_size[1] * 2))
     img = img.convert('RGB')
-    img = img.resize(resize_size, Image.Resampling.LANCZOS)
-    
-    # Convert to numpy array and reshape to list of pixels
-    img_array = np.array(img)
-    pixels = img_array.reshape((-1, 3))
     
-    # Apply K-means clustering
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    kmeans.fit(pixels)
+    # Downsample with an area filter, which averages colors and is far cheaper than LANCZOS
+    img_array = cv2.resize(np.asarray(img), resize_size, interpolation=cv2.INTER_AREA)
     
-    # Get cluster centers (dominant colors)
-    colors = kmeans.cluster_centers_.astype(int)
+    # Quantize the list of pixels into k color boxes
+    color_counts = median_cut(img_array.reshape((-1, 3)), k)
     
-    # Get cluster sizes to sort by dominance
-    labels = kmeans.labels_
-    unique, counts = np.unique(labels, return_counts=True)
-    
-    # Sort colors by cluster size (most dominant first)
-    color_counts = list(zip(colors, counts))
+    # Sort colors by box population (most dominant first)
     color_counts.sort(key=lambda x: x[1], reverse=True)
+    colors = [color for color, _ in color_counts]
     
-    return [tuple(color) for color, _ in color_counts]
-
-
-def calculate_brightness(rgb: Tuple[int, int, int]) -> float:
-    """Calculate perceived brightness using luminance formula."""
-    r, g, b = rgb
-    return (0.299 * r + 0.587 * g + 0.114 * b) / 255.0
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps(colors), encoding='utf-8')
+        except OSError:
+            pass  # Caching is best-effort
+    
+    return colors
 
 
-def calculate_saturation(rgb: Tuple[int, int, int]) -> float:
-    """Calculate color saturation."""
-    _, s, _ = rgb_to_hsv(rgb)
-    return s
+def is_near_grayscale_array(hsv: np.ndarray, threshold: float = 0.15) -> np.ndarray:
+    """Check which rows of an HSV array are near grayscale (low saturation)."""
+    return hsv[:, 1] < threshold
 
 
-def is_near_grayscale(rgb: Tuple[int, int, int], threshold: float = 0.15) -> bool:
-    """Check if a color is near grayscale (low saturation)."""
-    return calculate_saturation(rgb) < threshold
+def color_metrics(colors: List[Tuple[int, int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute perceived brightness and HSV values for a list of colors in one vectorized pass."""
+    rgb = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+    # Perceived brightness from the Rec. 601 luminance weights
+    brightness = (0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2]) / 255.0
+    return brightness, rgb_to_hsv_array(rgb)
 
 
-def find_color_category(colors: List[Tuple[int, int, int]], category: str) -> Tuple[int, int, int]:
+def find_color_category(colors: List[Tuple[int, int, int]], category: str,
+                        metrics: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[int, int, int]:
     """
     Find the best color for a specific category based on brightness and saturation.
     
     Args:
         colors: List of dominant colors
         category: Category name ('dark', 'middle', 'light', 'accent')
+        metrics: Precomputed color_metrics(colors), to share across calls
         
     Returns:
         RGB tuple for the best matching color
     """
+    brightness, hsv = metrics if metrics is not None else color_metrics(colors)
+    saturation = hsv[:, 1]
+    
     if category == 'dark':
         # Find darkest color that's not pure black - be more aggressive about picking dark colors
-        candidates = [c for c in colors if calculate_brightness(c) < 0.2 and calculate_brightness(c) > 0.02]
-        if not candidates:
+        candidates = np.flatnonzero((brightness < 0.2) & (brightness > 0.02))
+        if not candidates.size:
             # Fallback to slightly less dark colors
-            candidates = [c for c in colors if calculate_brightness(c) < 0.3 and calculate_brightness(c) > 0.02]
-        if not candidates:
+            candidates = np.flatnonzero((brightness < 0.3) & (brightness > 0.02))
+        if not candidates.size:
             # If still no candidates, take the darkest available color and make it darker
-            darkest = min(colors, key=calculate_brightness)
+            darkest = colors[int(np.argmin(brightness))]
             # Ensure the darkest color is quite dark by reducing its brightness
             h, s, v = rgb_to_hsv(darkest)
             target_brightness = min(v, 0.15)  # Cap brightness at 0.15 (quite dark)
             return hsv_to_rgb((h, s, target_brightness))
-        return min(candidates, key=calculate_brightness)
+        return colors[candidates[np.argmin(brightness[candidates])]]
     
     elif category == 'middle':
         # Find medium brightness color, prefer slightly saturated
-        candidates = [c for c in colors if 0.25 < calculate_brightness(c) < 0.75]
-        if not candidates:
-            candidates = colors
-        return min(candidates, key=lambda c: abs(calculate_brightness(c) - 0.5))
+        candidates = np.flatnonzero((brightness > 0.25) & (brightness < 0.75))
+        if not candidates.size:
+            candidates = np.arange(len(colors))
+        return colors[candidates[np.argmin(np.abs(brightness[candidates] - 0.5))]]
     
     elif category == 'light':
         # Find bright color that's not pure white
-        candidates = [c for c in colors if calculate_brightness(c) > 0.7 and calculate_brightness(c) < 0.95]
-        if not candidates:
-            candidates = [c for c in colors if calculate_brightness(c) > 0.6]
-        return max(candidates, key=calculate_brightness) if candidates else colors[0]
+        candidates = np.flatnonzero((brightness > 0.7) & (brightness < 0.95))
+        if not candidates.size:
+            candidates = np.flatnonzero(brightness > 0.6)
+        return colors[candidates[np.argmax(brightness[candidates])]] if candidates.size else colors[0]
     
     elif category == 'accent':
         # Find most saturated color that's not too dark or too light
-        candidates = [c for c in colors if 0.2 < calculate_brightness(c) < 0.8 and not is_near_grayscale(c)]
-        if not candidates:
-            candidates = [c for c in colors if not is_near_grayscale(c)]
-        return max(candidates, key=calculate_saturation) if candidates else colors[0]
+        colorful = ~is_near_grayscale_array(hsv)
+        candidates = np.flatnonzero((brightness > 0.2) & (brightness < 0.8) & colorful)
+        if not candidates.size:
+            candidates = np.flatnonzero(colorful)
+        return colors[candidates[np.argmax(saturation[candidates])]] if candidates.size else colors[0]
     
     return colors[0]
 
@@ -298,10 +463,14 @@ def map_colors_to_theme(dominant_colors: List[Tuple[int, int, int]]) -> Dict[str
     Returns:
         Dictionary containing theme color definitions
     """
+    # Brightness and HSV of every dominant color, computed once for all lookups
+    metrics = color_metrics(dominant_colors)
+    _, hsv = metrics
+    
     # Find base colors for main categories
-    base_dark = find_color_category(dominant_colors, 'dark')
-    base_middle = find_color_category(dominant_colors, 'middle')
-    base_light = find_color_category(dominant_colors, 'light')
+    base_dark = find_color_category(dominant_colors, 'dark', metrics)
+    base_middle = find_color_category(dominant_colors, 'middle', metrics)
+    base_light = find_color_category(dominant_colors, 'light', metrics)
     
     # Generate variations for the base colors
     # Create darker and lighter versions of middle color for base01 and border
@@ -315,14 +484,13 @@ def map_colors_to_theme(dominant_colors: List[Tuple[int, int, int]]) -> Dict[str
     base_light02 = hsv_to_rgb((light_h, max(0, light_s - 0.1), min(1.0, light_v + 0.05)))
     
     # Find accent colors from remaining colors
-    accent_candidates = [c for c in dominant_colors if not is_near_grayscale(c, 0.2)]
+    accent_candidates = hsv[~is_near_grayscale_array(hsv, 0.2)]
     
     # Generate diverse accent colors
     accents = []
     used_hues = set()
     
-    for color in accent_candidates:
-        h, s, v = rgb_to_hsv(color)
+    for h, s, v in accent_candidates.tolist():
         hue_bucket = int(h * 12)  # Divide hue space into 12 buckets
         
         if hue_bucket not in used_hues and len(accents) < 8:
@@ -333,14 +501,19 @@ def map_colors_to_theme(dominant_colors: List[Tuple[int, int, int]]) -> Dict[str
             used_hues.add(hue_bucket)
     
     # Fill remaining accents with color-shifted versions
-    while len(accents) < 8:
-        base_accent = accents[0] if accents else find_color_category(dominant_colors, 'accent')
-        h, s, v = rgb_to_hsv(base_accent)
+    if len(accents) < 8:
+        if not accents:
+            # Seed with the best accent from the image; its hue is not shifted
+            h, s, v = rgb_to_hsv(find_color_category(dominant_colors, 'accent', metrics))
+            accents.append(hsv_to_rgb((h, max(0.6, s), max(0.4, min(0.8, v)))))
         
-        # Shift hue by a golden ratio to get pleasing color combinations
-        hue_shift = 0.618 * len(accents)  # Golden ratio
-        new_h = (h + hue_shift) % 1.0
-        accents.append(hsv_to_rgb((new_h, max(0.6, s), max(0.4, min(0.8, v)))))
+        # Shift the first accent's hue by multiples of the golden ratio for pleasing combinations
+        h, s, v = rgb_to_hsv(accents[0])
+        hue_shifts = 0.618 * np.arange(len(accents), 8)  # Golden ratio
+        shifted = np.column_stack(((h + hue_shifts) % 1.0,
+                                   np.full_like(hue_shifts, max(0.6, s)),
+                                   np.full_like(hue_shifts, max(0.4, min(0.8, v)))))
+        accents.extend(tuple(rgb) for rgb in hsv_to_rgb_array(shifted).tolist())
     
     # Create theme color definitions
     theme_colors = {
@@ -401,16 +574,22 @@ def map_colors_to_theme(dominant_colors: List[Tuple[int, int, int]]) -> Dict[str
 
 def create_color_preview(colors: List[Tuple[int, int, int]], output_path: str, title: str = "Extracted Colors"):
     """Create a visual preview of extracted colors."""
+    # Imported here so runs without --preview skip matplotlib's slow startup
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(1, 1, figsize=(12, 2))
     
-    # Create color swatches
-    for i, color in enumerate(colors):
-        ax.add_patch(plt.Rectangle((i, 0), 1, 1, facecolor=np.array(color)/255.0))
-        
+    # Draw all color swatches as a single one-row image instead of one patch per color
+    swatches = np.asarray(colors, dtype=np.uint8).reshape(1, -1, 3)
+    ax.imshow(swatches, extent=(0, len(colors), 0, 1), interpolation='nearest')
+    
+    # Label contrast follows each swatch's brightness, computed for the whole palette at once
+    brightness, _ = color_metrics(colors)
+    
+    for i, (color, color_brightness) in enumerate(zip(colors, brightness)):
         # Add hex label
         hex_color = rgb_to_hex(color)
-        brightness = calculate_brightness(color)
-        text_color = 'white' if brightness < 0.5 else 'black'
+        text_color = 'white' if color_brightness < 0.5 else 'black'
         
         ax.text(i + 0.5, 0.5, hex_color, ha='center', va='center', 
                 color=text_color, fontsize=8, rotation=90)
@@ -455,6 +634,14 @@ def copy_wallpaper_to_backgrounds(source_image_path: str, script_dir: Path) -> s
         # Load image and convert to PNG format
         from PIL import Image
         with Image.open(source_path) as img:
+            # An RGB PNG is already in the target format; copy its bytes instead of re-encoding
+            if img.format == 'PNG' and img.mode == 'RGB':
+                # Leave an identical wallpaper untouched so its mtime (and anything watching it) stays put
+                if wallpaper_path.exists() and filecmp.cmp(source_path, wallpaper_path, shallow=False):
+                    return str(wallpaper_path)
+                shutil.copyfile(source_path, wallpaper_path)
+                return str(wallpaper_path)
+            
             # Convert to RGB if necessary (handles RGBA, P mode, etc.)
             if img.mode in ('RGBA', 'LA', 'P'):
                 # Convert RGBA/LA/P to RGB with white background
@@ -466,8 +653,8 @@ def copy_wallpaper_to_backgrounds(source_image_path: str, script_dir: Path) -> s
             elif img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            # Save as PNG
-            img.save(wallpaper_path, 'PNG', optimize=True)
+            # Save as PNG with fast zlib settings; the wallpaper is replaced on the next theme anyway
+            img.save(wallpaper_path, 'PNG', compress_level=1)
         
         return str(wallpaper_path)
     except Exception as e:
@@ -485,6 +672,8 @@ def main():
                        help="Number of color clusters to extract (default: 8)")
     parser.add_argument("--preview", help="Generate color preview image", 
                        action="store_true")
+    parser.add_argument("--no-cache", help="Extract colors even if this image's palette is cached",
+                       action="store_true")
     parser.add_argument("--build", help="Automatically run build_theme.py after extraction", 
                        action="store_true")
     parser.add_argument("--output-dir", help="Output directory for the generated theme when using --build",
@@ -524,7 +713,8 @@ def main():
         
         # Extract dominant colors
         try:
-            dominant_colors = extract_dominant_colors(actual_image_path, k=args.clusters)
+            dominant_colors = extract_dominant_colors(actual_image_path, k=args.clusters,
+                                                      use_cache=not args.no_cache)
             print(f"✅ Extracted {len(dominant_colors)} dominant colors")
         except Exception as e:
             print(f"❌ Error extracting colors: {e}")
@@ -551,7 +741,7 @@ def main():
                 "source_image": original_image_path,
                 "source_type": "url" if is_url(original_image_path) else "local_file",
                 "wallpaper_path": wallpaper_path if wallpaper_path else "not copied",
-                "extraction_method": "k-means clustering",
+                "extraction_method": "median cut quantization",
                 "clusters": args.clusters,
                 "generated_by": "extract_colors_from_image.py"
             }
@@ -559,8 +749,11 @@ def main():
         
         # Save colors.json
         try:
-            with open(args.output, 'w') as f:
-                json.dump(colors_json, f, indent=2)
+            if orjson is not None:
+                Path(args.output).write_bytes(orjson.dumps(colors_json, option=orjson.OPT_INDENT_2))
+            else:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(colors_json, f, indent=2)
             print(f"💾 Theme colors saved to: {args.output}")
         except Exception as e:
             print(f"❌ Error saving colors: {e}")